@@ -1,5 +1,5 @@
 CREATE TABLE DimDate (
-    full_date VARCHAR(255),
+    full_date DATE,
     sk_date INT PRIMARY KEY,
     year INT,
     month INT,
@@ -4,6 +4,7 @@ Centralizes settings and database connectivity for the ETL pipeline.
 """
 
 import os
+from urllib.parse import quote
 import sqlalchemy
 import pyodbc
 
@@ -16,6 +17,14 @@ SQL_DATABASE_NAME = 'Northwind'
 ODBC_DRIVER = 'ODBC Driver 17 for SQL Server'
 USE_TRUSTED_CONNECTION = 'yes'
 
+# Connection URI for Arrow-native readers (connectorx). A backslash is not a
+# valid URL host character, so a named instance goes in instance_name instead.
+SQL_SERVER_HOST, _, SQL_SERVER_INSTANCE = SQL_SERVER_NAME.partition('\\')
+SQL_SERVER_URI = (
+    f"mssql://@{SQL_SERVER_HOST}/{quote(SQL_DATABASE_NAME)}?trusted_connection=true"
+    + (f"&instance_name={quote(SQL_SERVER_INSTANCE)}" if SQL_SERVER_INSTANCE else "")
+)
+
 ACCESS_DATABASE_NAME = 'Northwind 2012.accdb'
 
 # ================================
@@ -34,6 +43,13 @@ RAW_DIR = os.path.join(DATA_ROOT, 'raw')
 STAGING_DIR = os.path.join(DATA_ROOT, 'staging')
 WAREHOUSE_DIR = os.path.join(DATA_ROOT, 'warehouse')
 
+# ================================
+# NAME NORMALIZATION
+# ================================
+
+# Characters dropped from table/column names, applied with str.translate
+NAME_STRIP_CHARS = str.maketrans('', '', ' _')
+
 
 def create_sql_engine():
     """Create SQLAlchemy engine for SQL Server connection"""
@@ -3,15 +3,20 @@ Main ETL Pipeline Orchestrator
 Coordinates extraction, transformation, loading, and validation processes.
 """
 
+import argparse
 import time
+from concurrent.futures import ThreadPoolExecutor
 import extractor
 import transformer
 import loader
 import validator
 
 
-def run_etl_pipeline():
-    """Execute the complete ETL pipeline"""
+def run_etl_pipeline(write_csv=False):
+    """Execute the complete ETL pipeline
+
+    Set write_csv to also export the warehouse tables as CSV (Parquet is always written).
+    """
     pipeline_start = time.time()
 
     print("\n" + "=" * 50)
@@ -20,17 +25,27 @@ def run_etl_pipeline():
 
     # PHASE 1: EXTRACTION
     print("\n--- EXTRACTION PHASE ---")
-    try:
-        extractor.extract_from_sql_server()
-        extractor.extract_from_access()
-    except Exception as extract_error:
-        print(f"EXTRACTION FAILED: {extract_error}")
+    # Both sources are independent, so extract them concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        extraction_futures = {
+            'SQL Server': executor.submit(extractor.extract_from_sql_server),
+            'Access': executor.submit(extractor.extract_from_access)
+        }
+
+    extraction_failed = False
+    for source_name, future in extraction_futures.items():
+        extract_error = future.exception()
+        if extract_error:
+            print(f"EXTRACTION FAILED ({source_name}): {extract_error}")
+            extraction_failed = True
+
+    if extraction_failed:
         return
 
     # PHASE 2: TRANSFORMATION
     print("\n--- TRANSFORMATION PHASE ---")
     try:
-        transformer.run_transformation()
+        transformer.execute_transformation()
     except Exception as transform_error:
         print(f"TRANSFORMATION FAILED: {transform_error}")
         return
@@ -38,7 +53,7 @@ def run_etl_pipeline():
     # PHASE 3: LOADING
     print("\n--- LOADING PHASE ---")
     try:
-        loader.load_staging_to_warehouse()
+        loader.load_staging_to_warehouse(write_csv=write_csv)
     except Exception as load_error:
         print(f"LOADING FAILED: {load_error}")
         return
@@ -57,4 +72,6 @@ def run_etl_pipeline():
 
 
 if __name__ == "__main__":
-    run_etl_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--csv', action='store_true', help="also export warehouse tables as CSV")
+    run_etl_pipeline(write_csv=parser.parse_args().csv)
\ No newline at end of file
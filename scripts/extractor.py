@@ -3,24 +3,41 @@ Data Extraction Module
 Extracts data from SQL Server and MS Access sources.
 """
 
-import pandas as pd
 import os
+import datetime
+import decimal
 import warnings
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from config_connector import (
     create_sql_engine,
     create_access_connection,
-    RAW_DIR
+    RAW_DIR,
+    SQL_SERVER_URI,
+    NAME_STRIP_CHARS
 )
 
+# Optional Arrow-native reader for SQL Server (falls back to pyodbc)
+try:
+    import connectorx
+except ImportError:
+    connectorx = None
+
 from sqlalchemy.exc import SAWarning
 
 # Suppress SQLAlchemy warnings
 warnings.filterwarnings("ignore", category=SAWarning)
 
 
-def discover_access_tables():
-    """Retrieve table names from Access database"""
-    access_conn = create_access_connection()
+def discover_access_tables(access_conn=None):
+    """Retrieve table names from Access database
+
+    Reuses access_conn when given; otherwise opens and closes its own connection.
+    """
+    owns_connection = access_conn is None
+    if owns_connection:
+        access_conn = create_access_connection()
     if not access_conn:
         return []
 
@@ -34,7 +51,8 @@ def discover_access_tables():
     ]
 
     cursor.close()
-    access_conn.close()
+    if owns_connection:
+        access_conn.close()
 
     return tables
 
@@ -60,53 +78,215 @@ EXTRACTION_TABLES = [
 
 def normalize_table_name(name):
     """Standardize table names for comparison"""
-    return name.lower().replace(" ", "").strip()
+    return name.lower().translate(NAME_STRIP_CHARS)
+
+
+# Python types reported by pyodbc in cursor.description -> Arrow types
+ODBC_TO_ARROW_TYPES = {
+    str: pa.string(),
+    int: pa.int64(),
+    float: pa.float64(),
+    bool: pa.bool_(),
+    datetime.datetime: pa.timestamp('us'),
+    datetime.date: pa.date32(),
+    bytes: pa.binary(),
+    bytearray: pa.binary(),
+}
+
+
+def build_arrow_schema(cursor):
+    """Derive a fixed Arrow schema from an executed cursor's description"""
+    fields = []
+    for name, type_code, _, _, precision, scale, _ in cursor.description:
+        if type_code is decimal.Decimal:
+            arrow_type = pa.decimal128(precision, scale)
+        else:
+            # Unmapped driver types (time, GUID, ...) are stored as text
+            arrow_type = ODBC_TO_ARROW_TYPES.get(type_code, pa.string())
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def column_to_arrow(values, field):
+    """Convert one column of fetched values to an Arrow array of the field type"""
+    if field.type == pa.string():
+        values = [None if value is None else str(value) for value in values]
+
+    array = pa.array(values, type=field.type)
+
+    # Keep money/decimal columns as float64, matching what pandas would produce
+    if pa.types.is_decimal(field.type):
+        array = array.cast(pa.float64())
+
+    return array
+
+
+def decimals_as_float(schema):
+    """Replace decimal fields with float64, matching what pandas would produce"""
+    return pa.schema([
+        field.with_type(pa.float64()) if pa.types.is_decimal(field.type) else field
+        for field in schema
+    ])
+
+
+def dump_cursor_to_parquet(cursor, output_path, chunk_size=50_000):
+    """Stream the rows of an executed cursor straight to a Parquet file"""
+    read_schema = build_arrow_schema(cursor)
+    write_schema = decimals_as_float(read_schema)
+
+    row_count = 0
+
+    # Write to a temporary file so a failed fetch never leaves a truncated
+    # but valid-looking Parquet file behind
+    temp_path = output_path + '.tmp'
+
+    try:
+        with pq.ParquetWriter(temp_path, write_schema, compression='zstd') as writer:
+            while rows := cursor.fetchmany(chunk_size):
+                columns = [
+                    column_to_arrow(column_values, field)
+                    for field, column_values in zip(read_schema, zip(*rows))
+                ]
+                writer.write_table(pa.Table.from_arrays(columns, schema=write_schema))
+                row_count += len(rows)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    os.replace(temp_path, output_path)
+
+    return row_count
 
 
 # ================================
 # SQL SERVER EXTRACTION
 # ================================
 
+def _extract_one_sql(table, sql_engine):
+    """Extract a single SQL Server table to the raw directory
+
+    Returns (output filename, row count or None on failure, log line).
+    """
+    # Create output filename
+    output_filename = f"sql_{table.replace(' ', '_').lower()}.parquet"
+    output_path = os.path.join(RAW_DIR, output_filename)
+
+    try:
+        # Handle tables with spaces in names
+        sql_table_name = f"[{table}]" if " " in table else table
+
+        fallback_note = ""
+        if connectorx is not None:
+            try:
+                # Decode and write entirely in Rust/C++, no Python row loop
+                arrow_table = connectorx.read_sql(
+                    SQL_SERVER_URI,
+                    f"SELECT * FROM {sql_table_name}",
+                    return_type="arrow"
+                )
+                # Same raw schema as the pyodbc path
+                arrow_table = arrow_table.cast(decimals_as_float(arrow_table.schema))
+                pq.write_table(arrow_table, output_path, compression='zstd')
+                row_count = arrow_table.num_rows
+                return output_filename, row_count, f"  SQL Server: {table:20} → {output_filename} ({row_count:,} rows)"
+            except Exception as connectorx_error:
+                fallback_note = f" [connectorx failed, used pyodbc: {connectorx_error}]"
+
+        # Borrow a raw pyodbc connection from the engine's pool
+        raw_conn = sql_engine.raw_connection()
+        try:
+            cursor = raw_conn.cursor()
+            cursor.execute(f"SELECT * FROM {sql_table_name}")
+            row_count = dump_cursor_to_parquet(cursor, output_path)
+            cursor.close()
+        finally:
+            raw_conn.close()
+
+        return output_filename, row_count, f"  SQL Server: {table:20} → {output_filename} ({row_count:,} rows){fallback_note}"
+
+    except Exception as extraction_error:
+        return output_filename, None, f"  SQL Server extraction error ({table}): {extraction_error}"
+
+
 def extract_from_sql_server():
-    """Extract data from SQL Server database"""
+    """Extract data from SQL Server database
+
+    Returns a {filename: row count} mapping of the files written.
+    """
+    row_counts = {}
+
     sql_engine = create_sql_engine()
     if not sql_engine:
         print("SQL Server extraction skipped - connection unavailable")
-        return
+        return row_counts
 
     print("Extracting from SQL Server...")
 
-    for table in EXTRACTION_TABLES:
-        try:
-            # Handle tables with spaces in names
-            sql_table_name = f"[{table}]" if " " in table else table
-
-            df = pd.read_sql(f"SELECT * FROM {sql_table_name}", sql_engine)
-
-            # Create output filename
-            output_filename = f"sql_{table.replace(' ', '_').lower()}.csv"
-            output_path = os.path.join(RAW_DIR, output_filename)
+    # The engine's connection pool is thread-safe, so it is shared by all workers
+    with ThreadPoolExecutor(max_workers=len(EXTRACTION_TABLES)) as executor:
+        futures = [
+            executor.submit(_extract_one_sql, table, sql_engine)
+            for table in EXTRACTION_TABLES
+        ]
+        for future in as_completed(futures):
+            output_filename, row_count, message = future.result()
+            print(message)
+            if row_count is not None:
+                row_counts[output_filename] = row_count
 
-            df.to_csv(output_path, index=False)
-            print(f"  SQL Server: {table:20} → {output_filename} ({df.shape[0]:,} rows)")
+    sql_engine.dispose()
 
-        except Exception as extraction_error:
-            print(f"  SQL Server extraction error ({table}): {extraction_error}")
+    return row_counts
 
 
 # ================================
 # ACCESS DATABASE EXTRACTION
 # ================================
 
+def _extract_one_access(table, actual_table_name):
+    """Extract a single Access table to the raw directory
+
+    Returns (output filename, row count or None on failure, log line).
+    """
+    output_filename = f"access_{table.replace(' ', '_').lower()}.parquet"
+    output_path = os.path.join(RAW_DIR, output_filename)
+
+    # The ACE driver is not thread-safe on a shared connection,
+    # so every worker opens its own
+    access_conn = create_access_connection()
+    if not access_conn:
+        return output_filename, None, f"  Access extraction error ({table}): connection unavailable"
+
+    try:
+        cursor = access_conn.cursor()
+        cursor.execute(f"SELECT * FROM [{actual_table_name}]")
+        row_count = dump_cursor_to_parquet(cursor, output_path)
+        cursor.close()
+
+        return output_filename, row_count, f"  Access: {table:20} → {output_filename} ({row_count:,} rows)"
+
+    except Exception as access_error:
+        return output_filename, None, f"  Access extraction error ({table}): {access_error}"
+
+    finally:
+        access_conn.close()
+
+
 def extract_from_access():
-    """Extract data from MS Access database"""
+    """Extract data from MS Access database
+
+    Returns a {filename: row count} mapping of the files written.
+    """
+    row_counts = {}
+
     access_conn = create_access_connection()
     if not access_conn:
         print("Access database extraction skipped - connection unavailable")
-        return
+        return row_counts
 
     # Discover available tables in Access
-    access_tables = discover_access_tables()
+    access_tables = discover_access_tables(access_conn)
 
     # Create normalized name mapping
     access_table_map = {
@@ -119,6 +299,7 @@ def extract_from_access():
 
     print("\nExtracting from Access database...")
 
+    tables_to_extract = []
     for table in EXTRACTION_TABLES:
         normalized_name = normalize_table_name(table)
 
@@ -126,21 +307,25 @@ def extract_from_access():
             print(f"  Access: Table '{table}' not found in database")
             continue
 
-        actual_table_name = access_table_map[normalized_name]
-
-        try:
-            df = pd.read_sql(f"SELECT * FROM [{actual_table_name}]", access_conn)
+        tables_to_extract.append((table, access_table_map[normalized_name]))
 
-            output_filename = f"access_{table.replace(' ', '_').lower()}.csv"
-            output_path = os.path.join(RAW_DIR, output_filename)
+    access_conn.close()
 
-            df.to_csv(output_path, index=False)
-            print(f"  Access: {table:20} → {output_filename} ({df.shape[0]:,} rows)")
+    if not tables_to_extract:
+        return row_counts
 
-        except Exception as access_error:
-            print(f"  Access extraction error ({table}): {access_error}")
+    with ThreadPoolExecutor(max_workers=len(tables_to_extract)) as executor:
+        futures = [
+            executor.submit(_extract_one_access, table, actual_table_name)
+            for table, actual_table_name in tables_to_extract
+        ]
+        for future in as_completed(futures):
+            output_filename, row_count, message = future.result()
+            print(message)
+            if row_count is not None:
+                row_counts[output_filename] = row_count
 
-    access_conn.close()
+    return row_counts
 
 
 # ================================
@@ -154,20 +339,18 @@ def execute_extraction():
     print("=" * 50)
 
     print("\n--- SQL Server Extraction ---")
-    extract_from_sql_server()
+    row_counts = extract_from_sql_server()
 
     print("\n--- Access Database Extraction ---")
-    extract_from_access()
+    row_counts.update(extract_from_access())
 
     print("\n" + "-" * 30)
     print("EXTRACTION SUMMARY")
     print("-" * 30)
 
-    for file in os.listdir(RAW_DIR):
-        if file.endswith(".csv"):
-            file_path = os.path.join(RAW_DIR, file)
-            df = pd.read_csv(file_path)
-            print(f"{file:30}: {len(df):,} rows")
+    # Row counts were tracked while writing, no need to re-read the files
+    for file, row_count in sorted(row_counts.items()):
+        print(f"{file:30}: {row_count:,} rows")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,13 @@
+"""
+File Output Helpers
+Shared dataframe writers used by the transformation and loading stages.
+"""
+
+CSV_WRITE_BUFFER = 1 << 22
+CSV_CHUNK_SIZE = 200_000
+
+
+def write_buffered_csv(df, output_path):
+    """Write a dataframe to CSV through a large explicit write buffer"""
+    with open(output_path, 'w', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER) as csv_file:
+        df.to_csv(csv_file, index=False, chunksize=CSV_CHUNK_SIZE, lineterminator='\n')
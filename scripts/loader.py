@@ -3,13 +3,52 @@ Warehouse Loading Module
 Transforms staging data into final warehouse tables and generates schema.
 """
 
+import argparse
 import pandas as pd
 import os
+import pyarrow as pa
+import pyarrow.parquet as pq
 from config_connector import STAGING_DIR, WAREHOUSE_DIR
+from io_helpers import write_buffered_csv
 
 # Create warehouse directory if missing
 os.makedirs(WAREHOUSE_DIR, exist_ok=True)
 
+# Low-cardinality columns stored with Parquet dictionary encoding
+DICTIONARY_COLUMNS = [
+    'country',
+    'region',
+    'delivery_status',
+    'territories',
+    'sales_region',
+    'month_name'
+]
+
+
+# SQL column types keyed by NumPy dtype kind (anything else is VARCHAR)
+SQL_TYPES_BY_KIND = {
+    'i': "INT",
+    'u': "INT",
+    'f': "DECIMAL(10,2)",
+    'M': "DATE"
+}
+
+
+def write_warehouse_parquet(df, parquet_path):
+    """Write a warehouse table to Parquet, dictionary-encoding low-cardinality columns"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    dictionary_columns = [col for col in DICTIONARY_COLUMNS if col in table.column_names]
+
+    pq.write_table(
+        table,
+        parquet_path,
+        compression='zstd',
+        compression_level=3,
+        use_dictionary=dictionary_columns,
+        data_page_size=1 << 20,
+        write_statistics=True
+    )
+
 
 def create_ddl_schema(table_dict):
     """Generate SQL DDL statements from dataframe schemas"""
@@ -28,17 +67,12 @@ def create_ddl_schema(table_dict):
     for tbl_name, df in table_dict.items():
         column_definitions = []
 
-        for col_name, dtype in df.dtypes.items():
-            # Map pandas types to SQL types
-            if "int" in str(dtype):
-                sql_type = "INT"
-            elif "float" in str(dtype):
-                sql_type = "DECIMAL(10,2)"
-            elif "datetime" in str(dtype):
-                sql_type = "DATE"
-            else:
-                sql_type = "VARCHAR(255)"
+        # Map pandas types to SQL types
+        sql_types = df.dtypes.map(
+            lambda dtype: SQL_TYPES_BY_KIND.get(dtype.kind, "VARCHAR(255)")
+        )
 
+        for col_name, sql_type in sql_types.items():
             # Add PRIMARY KEY constraint
             if col_name == primary_keys.get(tbl_name):
                 sql_type += " PRIMARY KEY"
@@ -59,8 +93,11 @@ def create_ddl_schema(table_dict):
     print(f"Schema saved to: {schema_path}")
 
 
-def load_staging_to_warehouse():
-    """Main loading function: transforms staging files to warehouse tables"""
+def load_staging_to_warehouse(write_csv=False):
+    """Main loading function: transforms staging files to warehouse tables
+
+    Parquet is always written; set write_csv to also export each table as CSV.
+    """
     print("\n" + "="*50)
     print("STAGING TO WAREHOUSE LOAD PROCESS")
     print("="*50)
@@ -76,24 +113,35 @@ def load_staging_to_warehouse():
 
     loaded_datasets = {}
 
+    # Read every staging table before writing anything
     for staging_name, warehouse_name in staging_to_warehouse_map.items():
-        staging_path = os.path.join(STAGING_DIR, f"{staging_name}.csv")
+        staging_path = os.path.join(STAGING_DIR, f"{staging_name}.parquet")
 
         if os.path.exists(staging_path):
-            # Load staging data
-            df = pd.read_csv(staging_path)
-            loaded_datasets[warehouse_name] = df
+            loaded_datasets[warehouse_name] = pd.read_parquet(staging_path)
+        else:
+            print(f"[MISSING] Required staging file: {staging_name}")
 
-            # Save to warehouse in multiple formats
-            warehouse_csv = os.path.join(WAREHOUSE_DIR, f"{warehouse_name}.csv")
-            warehouse_parquet = os.path.join(WAREHOUSE_DIR, f"{warehouse_name}.parquet")
+    # Never overwrite part of the warehouse with empty tables
+    empty_tables = [name for name, df in loaded_datasets.items() if df.empty]
+    if empty_tables:
+        raise ValueError(f"Empty staging data for {', '.join(empty_tables)} - warehouse left unchanged")
 
-            df.to_csv(warehouse_csv, index=False)
-            df.to_parquet(warehouse_parquet, index=False)
+    for staging_name, warehouse_name in staging_to_warehouse_map.items():
+        if warehouse_name not in loaded_datasets:
+            continue
+        df = loaded_datasets[warehouse_name]
 
-            print(f"[TRANSFORMED] {staging_name:20} → {warehouse_name} ({len(df):,} rows)")
-        else:
-            print(f"[MISSING] Required staging file: {staging_name}")
+        # Save to warehouse (Parquet is the format read downstream)
+        warehouse_parquet = os.path.join(WAREHOUSE_DIR, f"{warehouse_name}.parquet")
+        write_warehouse_parquet(df, warehouse_parquet)
+
+        # Optional CSV export
+        if write_csv:
+            warehouse_csv = os.path.join(WAREHOUSE_DIR, f"{warehouse_name}.csv")
+            write_buffered_csv(df, warehouse_csv)
+
+        print(f"[TRANSFORMED] {staging_name:20} → {warehouse_name} ({len(df):,} rows)")
 
     # Generate SQL schema if data loaded
     if loaded_datasets:
@@ -106,4 +154,6 @@ def load_staging_to_warehouse():
 
 
 if __name__ == "__main__":
-    load_staging_to_warehouse()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--csv', action='store_true', help="also export warehouse tables as CSV")
+    load_staging_to_warehouse(write_csv=parser.parse_args().csv)
\ No newline at end of file
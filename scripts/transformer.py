@@ -3,49 +3,101 @@ Data Transformation Module
 Processes raw extracted data into cleaned dimensional and fact tables.
 """
 
+import argparse
 import pandas as pd
+import numpy as np
 import os
 import glob
-from config_connector import RAW_DIR, STAGING_DIR
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow as pa
+import pyarrow.parquet as pq
+from config_connector import RAW_DIR, STAGING_DIR, NAME_STRIP_CHARS
+from io_helpers import write_buffered_csv
+
+# Optional SQL engine for the order join (falls back to pandas merge)
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
 
 # Ensure staging directory exists
 os.makedirs(STAGING_DIR, exist_ok=True)
 
 
-def standardize_column_names(df):
-    """Clean and standardize dataframe column names"""
-    if df is not None:
-        df.columns = [
-            col.lower()
-            .strip()
-            .replace(' ', '')
-            .replace('_', '')
-            for col in df.columns
-        ]
-    return df
+def normalize_column_name(col):
+    """Standardize a single column name"""
+    return col.lower().translate(NAME_STRIP_CHARS)
 
 
-def load_source_data(table_name, primary_key_cols):
-    """Load and merge multiple source files for a given table"""
-    dataframes = []
-    search_pattern = os.path.join(RAW_DIR, f"*_{table_name}.csv")
+def select_available_columns(df, target_columns):
+    """Select target columns present in the dataframe, keeping target order"""
+    existing_columns = set(df.columns)
+    return df[[col for col in target_columns if col in existing_columns]]
+
+
+def align_column_types(tables):
+    """Cast columns whose types conflict across source tables to string"""
+    column_types = {}
+    for table in tables:
+        for field in table.schema:
+            if field.type != pa.null():
+                column_types.setdefault(field.name, set()).add(field.type)
+
+    # Numeric columns are widened by concat_tables; anything else is not
+    conflicting_columns = {
+        name for name, types in column_types.items()
+        if len(types) > 1
+        and not all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types)
+    }
+
+    aligned_tables = []
+    for table in tables:
+        for name in conflicting_columns.intersection(table.column_names):
+            index = table.column_names.index(name)
+            table = table.set_column(index, name, table[name].cast(pa.large_string()))
+        aligned_tables.append(table)
+
+    return aligned_tables
+
+
+def load_source_data(table_name, primary_key_cols, required=True):
+    """Load and merge multiple source files for a given table
+
+    Raises FileNotFoundError if a required table has no readable source file.
+    """
+    tables = []
+    search_pattern = os.path.join(RAW_DIR, f"*_{table_name}.parquet")
     source_files = glob.glob(search_pattern)
 
     print(f"Loading '{table_name}': Found {len(source_files)} source file(s)")
 
     for file_path in source_files:
         try:
-            df = pd.read_csv(file_path)
-            df = standardize_column_names(df)
-            dataframes.append(df)
+            table = pq.read_table(file_path)
+            table = table.rename_columns(
+                [normalize_column_name(col) for col in table.column_names]
+            )
+            tables.append(table)
         except Exception as load_error:
             print(f"Failed to load {file_path}: {load_error}")
 
-    if not dataframes:
+    if not tables:
+        if required:
+            raise FileNotFoundError(
+                f"No readable source file for required table '{table_name}' ({search_pattern})"
+            )
         return pd.DataFrame()
 
-    # Combine all source files
-    combined_df = pd.concat(dataframes, ignore_index=True)
+    # Combine all source files in Arrow (sources with mismatched
+    # key types, e.g. Access vs SQL Server customer ids, become strings)
+    if len(tables) == 1:
+        combined_table = tables[0]
+    else:
+        combined_table = pa.concat_tables(
+            align_column_types(tables),
+            promote_options='permissive'
+        )
+    combined_df = combined_table.to_pandas()
 
     # Deduplicate based on primary keys
     clean_primary_keys = [key.lower() for key in primary_key_cols]
@@ -53,15 +105,92 @@ def load_source_data(table_name, primary_key_cols):
     if set(clean_primary_keys).issubset(combined_df.columns):
         combined_df = combined_df.drop_duplicates(
             subset=clean_primary_keys,
-            keep='first'
+            keep='first',
+            ignore_index=True
         )
 
     return combined_df
 
 
+def parse_order_dates(orders_df):
+    """Parse order dates once so DimDate and FactSales share the same values
+
+    Returns a copy of orders_df with an added orderdate_dt datetime column.
+    """
+    if orders_df.empty:
+        return orders_df
+
+    return orders_df.assign(orderdate_dt=pd.to_datetime(
+        orders_df['orderdate'],
+        format='mixed',
+        errors='coerce',
+        cache=True
+    ))
+
+
+def build_date_key(dates):
+    """Compute YYYYMMDD integer date keys, using 19000101 for missing dates"""
+    missing = dates.isna().to_numpy()
+    components = dates.dt
+
+    # Integer arithmetic on date parts instead of a per-row strftime
+    date_key = (
+        components.year.fillna(1900).to_numpy('int32') * 10000 +
+        components.month.fillna(1).to_numpy('int32') * 100 +
+        components.day.fillna(1).to_numpy('int32')
+    )
+
+    return np.where(missing, 19000101, date_key).astype('int32')
+
+
+def join_order_details(details_df, orders_df):
+    """Inner join order lines to their order headers on orderid
+
+    Columns present in both inputs keep the order-line value under the plain
+    name. With DuckDB available the join runs in its engine; the pandas fallback
+    returns the same columns and dtypes.
+    """
+    if duckdb is None:
+        joined = pd.merge(details_df, orders_df, on='orderid', how='inner', suffixes=('', '_drop'))
+        return joined.drop(columns=[col for col in joined.columns if col.endswith('_drop')])
+
+    detail_columns = set(details_df.columns)
+    excluded_columns = ', '.join(
+        f'"{col}"' for col in orders_df.columns if col in detail_columns
+    )
+
+    con = duckdb.connect()
+    try:
+        # line_position keeps the order-line order that pd.merge would produce
+        con.register('details', details_df.assign(line_position=np.arange(len(details_df))))
+        con.register('orders', orders_df)
+
+        joined = con.execute(f"""
+            SELECT d.* EXCLUDE (line_position), o.* EXCLUDE ({excluded_columns})
+            FROM details AS d
+            JOIN orders AS o ON d.orderid = o.orderid
+            ORDER BY d.line_position
+        """).df()
+    finally:
+        con.close()
+
+    # DuckDB re-infers types (e.g. text dates, all-null columns); restore the input dtypes
+    source_dtypes = {**orders_df.dtypes.to_dict(), **details_df.dtypes.to_dict()}
+    for col in joined.columns:
+        if joined[col].dtype == source_dtypes[col]:
+            continue
+        restored = joined[col].astype(source_dtypes[col])
+        if source_dtypes[col] == object:
+            # Object columns hold None, not the <NA> of DuckDB's nullable types
+            restored = restored.astype(object).where(restored.notna(), None)
+        joined[col] = restored
+
+    return joined
+
+
 def create_debug_master(orders_df, details_df, customers_df, employees_df, products_df):
     """Create comprehensive master table for debugging purposes"""
-    master = pd.merge(details_df, orders_df, on='orderid', how='inner')
+    master = join_order_details(details_df, orders_df)
 
     if not customers_df.empty:
         master = pd.merge(master, customers_df, on='customerid', how='left', suffixes=('', '_cust'))
@@ -82,26 +211,17 @@ def create_date_dimension(orders_df):
     if orders_df.empty:
         return pd.DataFrame()
 
-    orders_df['orderdate'] = orders_df['orderdate'].astype(str)
+    # Reuse dates parsed by execute_transformation when available
+    if 'orderdate_dt' not in orders_df.columns:
+        orders_df = parse_order_dates(orders_df)
 
-    try:
-        dates = pd.to_datetime(
-            orders_df['orderdate'],
-            format='mixed',
-            errors='coerce'
-        ).dropna().unique()
-    except:
-        dates = pd.to_datetime(
-            orders_df['orderdate'],
-            infer_datetime_format=True,
-            errors='coerce'
-        ).dropna().unique()
+    dates = orders_df['orderdate_dt'].dropna().unique()
 
     date_dim = pd.DataFrame({'full_date': dates})
     date_dim = date_dim.sort_values('full_date')
 
     # Generate date attributes
-    date_dim['sk_date'] = date_dim['full_date'].dt.strftime('%Y%m%d').astype(int)
+    date_dim['sk_date'] = build_date_key(date_dim['full_date'])
     date_dim['year'] = date_dim['full_date'].dt.year
     date_dim['month'] = date_dim['full_date'].dt.month
     date_dim['month_name'] = date_dim['full_date'].dt.month_name()
@@ -127,9 +247,9 @@ def create_client_dimension(customers_df):
 
     client_dim['bk_customer_id'] = (
         client_dim['bk_customer_id']
-        .astype(str)
-        .str.upper()
+        .astype('string')
         .str.strip()
+        .str.upper()
     )
 
     # Ensure required geography columns exist
@@ -138,13 +258,11 @@ def create_client_dimension(customers_df):
             client_dim[geo_col] = 'Unknown'
 
     # Add surrogate key
-    client_dim['sk_client'] = range(1, len(client_dim) + 1)
+    client_dim['sk_client'] = np.arange(1, len(client_dim) + 1, dtype=np.int32)
 
     # Select final columns
     target_columns = ['sk_client', 'bk_customer_id', 'company_name', 'city', 'country', 'region']
-    available_columns = [col for col in target_columns if col in client_dim.columns]
-
-    return client_dim[available_columns]
+    return select_available_columns(client_dim, target_columns)
 
 
 def add_territory_info(employee_dim, emp_terr_df, territories_df, regions_df):
@@ -179,14 +297,16 @@ def add_territory_info(employee_dim, emp_terr_df, territories_df, regions_df):
     # Aggregate territories per employee
     territories_per_employee = (
         merged.groupby('employeeid')['territorydescription']
-        .apply(lambda x: ', '.join(x))
+        .agg(', '.join)
         .reset_index(name='territories')
     )
 
-    # Aggregate regions per employee
+    # Aggregate distinct regions per employee
     regions_per_employee = (
-        merged.groupby('employeeid')[region_col_name]
-        .apply(lambda x: ', '.join(set(x)))
+        merged[['employeeid', region_col_name]]
+        .drop_duplicates()
+        .groupby('employeeid')[region_col_name]
+        .agg(', '.join)
         .reset_index(name='sales_region')
     )
 
@@ -239,7 +359,7 @@ def create_employee_dimension(employees_df, emp_terr_df, territories_df, regions
     )
 
     # Add surrogate key
-    employee_dim['sk_employee'] = range(1, len(employee_dim) + 1)
+    employee_dim['sk_employee'] = np.arange(1, len(employee_dim) + 1, dtype=np.int32)
 
     # Enrich with territory information
     employee_dim = add_territory_info(
@@ -261,9 +381,7 @@ def create_employee_dimension(employees_df, emp_terr_df, territories_df, regions
         'territories'
     ]
 
-    available_columns = [col for col in target_columns if col in employee_dim.columns]
-
-    return employee_dim[available_columns]
+    return select_available_columns(employee_dim, target_columns)
 
 
 def create_sales_fact(orders_df, details_df, client_dim, employee_dim):
@@ -273,15 +391,16 @@ def create_sales_fact(orders_df, details_df, client_dim, employee_dim):
     if orders_df.empty or details_df.empty:
         return pd.DataFrame()
 
+    # Reuse dates parsed by execute_transformation when available
+    if 'orderdate_dt' not in orders_df.columns:
+        orders_df = parse_order_dates(orders_df)
+
     # Merge order details with order headers
-    sales_fact = pd.merge(details_df, orders_df, on='orderid', how='inner')
+    sales_fact = join_order_details(details_df, orders_df)
 
     # Identify price column
-    if 'unitprice_x' in sales_fact.columns:
-        price_column = 'unitprice_x'
-    elif 'unitprice' in sales_fact.columns:
-        price_column = 'unitprice'
-    else:
+    price_column = 'unitprice'
+    if price_column not in sales_fact.columns:
         return pd.DataFrame()
 
     # Calculate total amount
@@ -291,17 +410,22 @@ def create_sales_fact(orders_df, details_df, client_dim, employee_dim):
                                  ) * (1 - sales_fact['discount'])
 
     # Determine delivery status
-    sales_fact['delivery_status'] = sales_fact['shippeddate'].apply(
-        lambda x: 'Delivered' if pd.notnull(x) and str(x).strip() != '' else 'Not Delivered'
-    )
+    shipped_date = sales_fact['shippeddate']
+    is_delivered = shipped_date.notna()
+
+    # Text dates may also be blank rather than null
+    if not pd.api.types.is_datetime64_any_dtype(shipped_date):
+        is_delivered &= shipped_date.astype('string').str.strip().ne('')
+
+    sales_fact['delivery_status'] = np.where(is_delivered, 'Delivered', 'Not Delivered')
 
     # Clean customer ID for joining
     if 'customerid' in sales_fact.columns:
         sales_fact['customerid'] = (
             sales_fact['customerid']
-            .astype(str)
-            .str.upper()
+            .astype('string')
             .str.strip()
+            .str.upper()
         )
 
     # Link to client dimension
@@ -325,27 +449,7 @@ def create_sales_fact(orders_df, details_df, client_dim, employee_dim):
         )
 
     # Create date key
-    sales_fact['orderdate'] = sales_fact['orderdate'].astype(str)
-
-    try:
-        sales_fact['dt'] = pd.to_datetime(
-            sales_fact['orderdate'],
-            format='mixed',
-            errors='coerce'
-        )
-    except:
-        sales_fact['dt'] = pd.to_datetime(
-            sales_fact['orderdate'],
-            infer_datetime_format=True,
-            errors='coerce'
-        )
-
-    sales_fact['sk_date'] = (
-        sales_fact['dt']
-        .dt.strftime('%Y%m%d')
-        .fillna(19000101)
-        .astype(int)
-    )
+    sales_fact['sk_date'] = build_date_key(sales_fact['orderdate_dt'])
 
     # Final column renaming
     sales_fact = sales_fact.rename(columns={
@@ -354,7 +458,7 @@ def create_sales_fact(orders_df, details_df, client_dim, employee_dim):
     })
 
     # Add fact surrogate key
-    sales_fact['fact_id'] = range(1, len(sales_fact) + 1)
+    sales_fact['fact_id'] = np.arange(1, len(sales_fact) + 1, dtype=np.int32)
 
     # Select final columns
     final_columns = [
@@ -370,27 +474,36 @@ def create_sales_fact(orders_df, details_df, client_dim, employee_dim):
         'delivery_status'
     ]
 
-    available_columns = [col for col in final_columns if col in sales_fact.columns]
+    return select_available_columns(sales_fact, final_columns)
 
-    return sales_fact[available_columns]
 
+def save_staging_table(df, staging_name, write_csv=False):
+    """Write one staging table as Parquet, plus a CSV copy if requested"""
+    df.to_parquet(os.path.join(STAGING_DIR, f"{staging_name}.parquet"), index=False)
 
-def execute_transformation():
-    """Main transformation orchestration function"""
+    if write_csv:
+        write_buffered_csv(df, os.path.join(STAGING_DIR, f"{staging_name}.csv"))
+
+
+def execute_transformation(write_csv=False):
+    """Main transformation orchestration function
+
+    Staging tables are written as Parquet; set write_csv to also dump CSV copies for debugging.
+    """
     print("\n" + "=" * 50)
     print("DATA TRANSFORMATION PROCESS")
     print("=" * 50)
 
     # Load source data
-    orders = load_source_data('orders', ['orderid'])
+    orders = parse_order_dates(load_source_data('orders', ['orderid']))
     details = load_source_data('order_details', ['orderid', 'productid'])
     customers = load_source_data('customers', ['customerid'])
     employees = load_source_data('employees', ['employeeid'])
 
     # Load additional HR data for employee enrichment
-    emp_territories = load_source_data('employeeterritories', ['employeeid', 'territoryid'])
-    territories = load_source_data('territories', ['territoryid'])
-    regions = load_source_data('region', ['regionid'])
+    emp_territories = load_source_data('employeeterritories', ['employeeid', 'territoryid'], required=False)
+    territories = load_source_data('territories', ['territoryid'], required=False)
+    regions = load_source_data('region', ['regionid'], required=False)
 
     # Create dimension tables
     dim_date = create_date_dimension(orders)
@@ -410,13 +523,24 @@ def execute_transformation():
     print("SAVING STAGING FILES")
     print("-" * 30)
 
-    dim_date.to_csv(os.path.join(STAGING_DIR, 'cleaned_date.csv'), index=False)
-    dim_client.to_csv(os.path.join(STAGING_DIR, 'cleaned_clients.csv'), index=False)
-    dim_employee.to_csv(os.path.join(STAGING_DIR, 'cleaned_employees.csv'), index=False)
-    fact_sales.to_csv(os.path.join(STAGING_DIR, 'cleaned_sales.csv'), index=False)
+    staging_tables = [
+        (dim_date, 'cleaned_date'),
+        (dim_client, 'cleaned_clients'),
+        (dim_employee, 'cleaned_employees'),
+        (fact_sales, 'cleaned_sales')
+    ]
+
+    # Each table is an independent file, so write them concurrently
+    with ThreadPoolExecutor(max_workers=len(staging_tables)) as executor:
+        list(executor.map(
+            lambda staging_table: save_staging_table(*staging_table, write_csv),
+            staging_tables
+        ))
 
     print("\nTRANSFORMATION COMPLETE ✓")
 
 
 if __name__ == "__main__":
-    execute_transformation()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--csv', action='store_true', help="also write staging tables as CSV for debugging")
+    execute_transformation(write_csv=parser.parse_args().csv)
\ No newline at end of file
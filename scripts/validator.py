@@ -3,18 +3,73 @@ Data Warehouse Validation Module
 Checks existence, completeness, and data quality of warehouse tables.
 """
 
-import pandas as pd
 import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow.parquet as pq
 from config_connector import WAREHOUSE_DIR
 
+# Outcome of validating one warehouse table
+ValidationResult = namedtuple('ValidationResult', ['table', 'ok', 'messages'])
 
-def validate_missing_values(df, table_name):
-    """Check for null values in a dataframe"""
-    null_count = df.isnull().sum().sum()
+
+def count_missing_values(parquet_file):
+    """Count null values from Parquet column statistics, reading data only if needed"""
+    metadata = parquet_file.metadata
+    null_count = 0
+    columns_without_stats = []
+
+    for col_index in range(metadata.num_columns):
+        column_nulls = 0
+
+        for rg_index in range(metadata.num_row_groups):
+            statistics = metadata.row_group(rg_index).column(col_index).statistics
+            if statistics is None or not statistics.has_null_count:
+                columns_without_stats.append(metadata.schema.column(col_index).name)
+                break
+            column_nulls += statistics.null_count
+        else:
+            null_count += column_nulls
+
+    # Fall back to reading only the columns lacking statistics
+    if columns_without_stats:
+        table = parquet_file.read(columns=columns_without_stats)
+        null_count += sum(column.null_count for column in table.columns)
+
+    return null_count
+
+
+def validate_missing_values(parquet_file, table_name):
+    """Check for null values in a warehouse table"""
+    null_count = count_missing_values(parquet_file)
     if null_count > 0:
-        print(f"[WARNING] {table_name}: Contains {null_count} missing values (may be expected for optional fields).")
-    else:
-        print(f"[OK] {table_name}: No missing values detected.")
+        return f"[WARNING] {table_name}: Contains {null_count} missing values (may be expected for optional fields)."
+    return f"[OK] {table_name}: No missing values detected."
+
+
+def _validate_one(table):
+    """Validate a single warehouse table, returning its result and report lines"""
+    file_path = os.path.join(WAREHOUSE_DIR, f"{table}.parquet")
+
+    # Check table existence
+    if not os.path.exists(file_path):
+        return ValidationResult(table, False, [f"[ERROR] Table missing: {table}"])
+
+    try:
+        # Inspect table metadata without loading its data
+        parquet_file = pq.ParquetFile(file_path)
+        row_count = parquet_file.metadata.num_rows
+
+        if row_count == 0:
+            return ValidationResult(table, False, [f"[ERROR] Table empty: {table}"])
+
+        return ValidationResult(table, True, [
+            f"[LOADED] {table}: {row_count:,} records",
+            validate_missing_values(parquet_file, table)
+        ])
+
+    except Exception as error:
+        return ValidationResult(table, False, [f"[ERROR] Failed to read {table}: {error}"])
 
 
 def execute_warehouse_validation():
@@ -25,31 +80,17 @@ def execute_warehouse_validation():
 
     # Tables expected in the warehouse (DimProduct removed per requirements)
     warehouse_tables = ['FactSales', 'DimDate', 'DimClient', 'DimEmployee']
-    validation_passed = True
-
-    for table in warehouse_tables:
-        file_path = os.path.join(WAREHOUSE_DIR, f"{table}.parquet")
-
-        # Check table existence
-        if not os.path.exists(file_path):
-            print(f"[ERROR] Table missing: {table}")
-            validation_passed = False
-            continue
-
-        try:
-            # Load and inspect table
-            df = pd.read_parquet(file_path)
-
-            if df.empty:
-                print(f"[ERROR] Table empty: {table}")
-                validation_passed = False
-            else:
-                print(f"[LOADED] {table}: {len(df):,} records")
-                validate_missing_values(df, table)
-
-        except Exception as error:
-            print(f"[ERROR] Failed to read {table}: {error}")
-            validation_passed = False
+
+    # Tables are independent, so check them concurrently
+    with ThreadPoolExecutor(max_workers=len(warehouse_tables)) as executor:
+        results = list(executor.map(_validate_one, warehouse_tables))
+
+    # Report in the fixed table order
+    for result in results:
+        for message in result.messages:
+            print(message)
+
+    validation_passed = all(result.ok for result in results)
 
     # Final validation result
     print("\n" + "-" * 30)